@@ -3,17 +3,23 @@
 from ._version import __version__
 from .gellermann import (
     DEFAULT_ALTERNATION_TOLERANCE,
+    count_gellermann_series,
     generate_all_gellermann_series,
     generate_gellermann_series,
     generate_gellermann_series_table,
-    is_gellermann_series
+    is_gellermann_series,
+    rank_gellermann_series,
+    unrank_gellermann_series
 )
 
 __all__ = [
     '__version__',
     'DEFAULT_ALTERNATION_TOLERANCE',
+    'count_gellermann_series',
     'generate_all_gellermann_series',
     'generate_gellermann_series',
     'generate_gellermann_series_table',
-    'is_gellermann_series'
+    'is_gellermann_series',
+    'rank_gellermann_series',
+    'unrank_gellermann_series'
 ]
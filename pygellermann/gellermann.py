@@ -20,16 +20,20 @@
 import numpy as np
 import pandas as pd
 
+import functools
 import itertools
+import operator
 
 import numpy.typing as npt
-from typing import Any, Iterator, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterator, List, Literal, Optional, Sequence, Tuple, Union, overload
 
 # TODO: uneven length sequences
 # TODO: optimize multiple calculations
 # TODO: C backend?
 
 DEFAULT_ALTERNATION_TOLERANCE = 0.1
+DEFAULT_BLOCK_SIZE = 1024
+CANDIDATE_BATCH_SIZE = 4096
 
 
 BoolSequence = npt.NDArray[np.bool_]
@@ -89,6 +93,29 @@ def is_boolean_gellermann_series(s: BoolSequence, alternation_tolerance: float =
             close_to_fifty_percent_alternation(s, alternation_tolerance))
 
 
+def is_boolean_gellermann_series_batch(s: npt.NDArray[np.bool_],
+                                       alternation_tolerance: float = DEFAULT_ALTERNATION_TOLERANCE) -> npt.NDArray[np.bool_]:
+    """Check which rows of a 2D boolean array are Gellermann series."""
+    assert s.ndim == 2 and s.shape[1] % 2 == 0
+    assert 0 <= alternation_tolerance <= 0.5
+
+    n = s.shape[1]
+    half, p = n // 2, n // 5
+
+    first_half = np.sum(s[:, :half], axis=1)
+    second_half = np.sum(s[:, half:], axis=1)
+    successive = s[:, :-1] == s[:, 1:]
+
+    valid: npt.NDArray[np.bool_] = first_half + second_half == half
+    valid &= ~np.any(successive[:, :-2] & successive[:, 1:-1] & successive[:, 2:], axis=1)
+    valid &= (first_half >= p) & (half - first_half >= p) & (second_half >= p) & (half - second_half >= p)
+    valid &= np.sum(~successive, axis=1) <= half
+    for alternation in ([True, False], [True, True, False, False], [True, False, False, True]):
+        matches = np.sum(s == np.tile(alternation, n // len(alternation) + 1)[:n], axis=1) / n
+        valid &= (0.5 - alternation_tolerance <= matches) & (matches <= 0.5 + alternation_tolerance)
+    return valid
+
+
 def is_gellermann_series(s: Sequence[Any], alternation_tolerance: float = DEFAULT_ALTERNATION_TOLERANCE) -> bool:
     """Check if a binary sequence is a Gellermann series.
 
@@ -135,8 +162,13 @@ def is_gellermann_series(s: Sequence[Any], alternation_tolerance: float = DEFAUL
 
 
 def generate_boolean_gellermann_series(n: int, m: int, rng: Optional[np.random.Generator] = None,
-                                       max_iterations: Optional[int] = None, **kwargs: Any) -> Iterator[BoolSequence]:
-    """Generate m random boolean Gellermann series of length n."""
+                                       max_iterations: Optional[int] = None, copy: bool = True,
+                                       **kwargs: Any) -> Iterator[BoolSequence]:
+    """Generate m random boolean Gellermann series of length n.
+
+    If copy is False, the same internal array is yielded every time, and is only valid until the
+    next series is generated.
+    """
     assert n % 2 == 0
     assert m > 0
 
@@ -147,15 +179,105 @@ def generate_boolean_gellermann_series(n: int, m: int, rng: Optional[np.random.G
     for _ in itertools.islice(itertools.count(), max_iterations):
         rng.shuffle(s)
         if is_boolean_gellermann_series(s, **kwargs):
-            yield s.copy()
+            yield s.copy() if copy else s
             m -= 1
 
         if m == 0:
             break
 
 
-def generate_gellermann_series(n: int, m: int, choices: Tuple[Any, Any] = ('A', 'B'), rng: Optional[np.random.Generator] = None,
-                               max_iterations: Optional[int] = None, **kwargs: Any) -> Iterator[Sequence[Any]]:
+def generate_boolean_gellermann_series_blocks(n: int, m: int, block_size: int, rng: Optional[np.random.Generator] = None,
+                                              max_iterations: Optional[int] = None, out: Optional[npt.NDArray[Any]] = None,
+                                              **kwargs: Any) -> Iterator[npt.NDArray[Any]]:
+    """Generate m random boolean Gellermann series of length n, in 2D blocks of block_size rows.
+
+    Candidate series are shuffled and checked in batches of `CANDIDATE_BATCH_SIZE` rows at once.
+    If out is None, a new block is allocated for every yielded block. Otherwise, out (of shape
+    (block_size, n)) is filled and views of it are yielded, which are only valid until the next
+    block is generated.
+    """
+    assert n % 2 == 0
+    assert m > 0
+    assert block_size > 0
+    assert out is None or out.shape == (block_size, n)
+
+    if rng is None:
+        rng = np.random.default_rng()
+    candidates = np.tile(np.repeat([True, False], n // 2), (CANDIDATE_BATCH_SIZE, 1))
+
+    block = np.empty((block_size, n), dtype=bool) if out is None else out
+    i = 0
+    iterations = 0
+    while m > 0 and (max_iterations is None or iterations < max_iterations):
+        batch = candidates[:CANDIDATE_BATCH_SIZE if max_iterations is None else min(CANDIDATE_BATCH_SIZE, max_iterations - iterations)]
+        rng.permuted(batch, axis=1, out=batch)
+        iterations += len(batch)
+
+        accepted = batch[is_boolean_gellermann_series_batch(batch, **kwargs)][:m]
+        m -= len(accepted)
+        while len(accepted) > 0:
+            k = min(len(accepted), block_size - i)
+            block[i:i + k] = accepted[:k]
+            accepted = accepted[k:]
+            i += k
+            if i == block_size:
+                yield block
+                block = np.empty((block_size, n), dtype=bool) if out is None else out
+                i = 0
+
+    if i > 0:
+        yield block[:i]
+
+
+def _choices_array(choices: Tuple[Any, Any], dtype: Optional[npt.DTypeLike] = None) -> npt.NDArray[Any]:
+    """Convert the two choices to a 1D NumPy array of length 2, preserving the original elements.
+
+    If dtype is given, the choices are converted to that dtype, raising a ValueError if they cannot
+    be represented exactly.
+    """
+    if dtype is None:
+        try:
+            choices_array = np.array(choices)
+        except ValueError:
+            choices_array = None
+        if (choices_array is None or choices_array.shape != (2,) or choices_array.dtype.kind in 'SUO' or
+                type(choices[0]) is not type(choices[1])):
+            choices_array = np.empty(2, dtype=object)
+            choices_array[0], choices_array[1] = choices
+        return choices_array
+
+    try:
+        choices_array = _choices_array(choices).astype(dtype)
+    except (ValueError, TypeError):
+        choices_array = None
+    if choices_array is None or not all(bool(x == c) for x, c in zip(choices_array, choices)):
+        raise ValueError(f"Choices {choices} cannot be stored in an output array of type {np.dtype(dtype)}.")
+    return choices_array
+
+
+@overload
+def generate_gellermann_series(n: int, m: int, choices: Optional[Tuple[Any, Any]] = ..., rng: Optional[np.random.Generator] = ...,
+                               max_iterations: Optional[int] = ..., output: Literal['list'] = ..., block_size: None = ...,
+                               out: None = ..., **kwargs: Any) -> Iterator[Sequence[Any]]: ...
+
+
+@overload
+def generate_gellermann_series(n: int, m: int, choices: Optional[Tuple[Any, Any]] = ..., rng: Optional[np.random.Generator] = ...,
+                               max_iterations: Optional[int] = ..., *, output: Literal['array'], block_size: Optional[int] = ...,
+                               out: Optional[npt.NDArray[Any]] = ..., **kwargs: Any) -> Iterator[npt.NDArray[Any]]: ...
+
+
+@overload
+def generate_gellermann_series(n: int, m: int, choices: Optional[Tuple[Any, Any]] = ..., rng: Optional[np.random.Generator] = ...,
+                               max_iterations: Optional[int] = ..., output: str = ..., block_size: Optional[int] = ...,
+                               out: Optional[npt.NDArray[Any]] = ...,
+                               **kwargs: Any) -> Iterator[Union[Sequence[Any], npt.NDArray[Any]]]: ...
+
+
+def generate_gellermann_series(n: int, m: int, choices: Optional[Tuple[Any, Any]] = None, rng: Optional[np.random.Generator] = None,
+                               max_iterations: Optional[int] = None, output: str = 'list', block_size: Optional[int] = None,
+                               out: Optional[npt.NDArray[Any]] = None,
+                               **kwargs: Any) -> Iterator[Union[Sequence[Any], npt.NDArray[Any]]]:
     """Generate m random Gellermann series of length n.
 
     Note that this function returns a generator object. To turn it into a list of series, use
@@ -163,6 +285,12 @@ def generate_gellermann_series(n: int, m: int, choices: Tuple[Any, Any] = ('A',
 
     To generate a single Gellermann series, use `next(generate_gellermann_series(n, 1))`.
 
+    With `output='array'`, the series are instead yielded as 2D NumPy arrays of shape
+    (block_size, n), with one series per row (the last block can contain fewer rows). Without
+    choices, these blocks are boolean arrays, with True corresponding to the second choice. In
+    this mode, candidate series are generated and checked in vectorized batches, so the generated
+    series differ from the list output for the same random number generator.
+
     Parameters
     ----------
     n
@@ -170,23 +298,71 @@ def generate_gellermann_series(n: int, m: int, choices: Tuple[Any, Any] = ('A',
     m
         The number of series to generate.
     choices
-        The two elements of the series (default: ('A', 'B')).
+        The two elements of the series (default: None, which uses ('A', 'B') for list output and
+        yields boolean arrays for array output).
     rng
         A NumPy random number generator (default: None, which uses the default NumPy random number
         generator).
     max_iterations
         The maximum number of iterations to try to generate all Gellermann series (default: None,
         which tries indefinitely).
+    output
+        Either 'list', to yield each series as a list, or 'array', to yield blocks of series as
+        2D NumPy arrays (default: 'list').
+    block_size
+        The maximum number of series per block for array output (default: None, which uses the
+        number of rows of out, or otherwise the smallest of m and 1024).
+    out
+        A preallocated 2D NumPy array of shape (block_size, n) for array output, which is filled
+        in place and yielded (as a view) for every block, overwriting the previous block (default:
+        None, which allocates a new array for every block).
     kwargs
         Additional keyword arguments passed to `is_gellermann_series`.
 
     Yields
     ------
-    Iterator[Sequence[Any]]
-        A generator object with m Gellermann series of length n.
+    Iterator[Union[Sequence[Any], npt.NDArray[Any]]]
+        A generator object with m Gellermann series of length n, or with blocks containing a total
+        of m Gellermann series of length n.
+
+    Raises
+    ------
+    ValueError
+        If m is not positive, if output is not 'list' or 'array', if block_size is not positive,
+        if out does not have shape (block_size, n), or if the choices cannot be stored in out.
     """
-    for s in generate_boolean_gellermann_series(n, m, rng=rng, max_iterations=max_iterations, **kwargs):
-        yield [choices[int(x)] for x in s]
+    if m <= 0:
+        raise ValueError(f"Number of series {m} is not positive.")
+
+    if output == 'list':
+        if block_size is not None or out is not None:
+            raise ValueError("Arguments block_size and out are only supported with output='array'.")
+        if choices is None:
+            choices = ('A', 'B')
+        for s in generate_boolean_gellermann_series(n, m, rng=rng, max_iterations=max_iterations, copy=False, **kwargs):
+            yield [choices[int(x)] for x in s]
+    elif output == 'array':
+        if block_size is None:
+            block_size = min(m, DEFAULT_BLOCK_SIZE) if out is None else len(out)
+        if block_size <= 0:
+            raise ValueError(f"Block size {block_size} is not positive.")
+        if out is not None and out.shape != (block_size, n):
+            raise ValueError(f"Output array shape {out.shape} does not match {(block_size, n)}.")
+
+        if choices is None:
+            yield from generate_boolean_gellermann_series_blocks(n, m, block_size, rng=rng, max_iterations=max_iterations,
+                                                                 out=out, **kwargs)
+        else:
+            choices_array = _choices_array(choices, dtype=None if out is None else out.dtype)
+            scratch = np.empty((block_size, n), dtype=bool)
+            for block in generate_boolean_gellermann_series_blocks(n, m, block_size, rng=rng, max_iterations=max_iterations,
+                                                                   out=scratch, **kwargs):
+                if out is None:
+                    yield choices_array.take(block.view(np.uint8))
+                else:
+                    yield np.take(choices_array, block.view(np.uint8), out=out[:len(block)])
+    else:
+        raise ValueError(f"Output type '{output}' is not 'list' or 'array'.")
 
 
 def generate_all_boolean_gellermann_series(n: int, **kwargs: Any) -> Iterator[BoolSequence]:
@@ -219,6 +395,263 @@ def generate_all_gellermann_series(n: int, choices: Tuple[Any, Any] = ('A', 'B')
         yield [choices[int(x)] for x in s]
 
 
+def _gellermann_series_step(n: int, alternation_range: Tuple[int, int], i: int, state: Tuple[int, ...],
+                            x: bool) -> Optional[Tuple[int, ...]]:
+    """Extend the state of a partial boolean series of length i with element x.
+
+    The state consists of the number of True elements, the signed length of the final run of
+    equal elements (positive for True, negative for False), the number of reversals, and the
+    number of matches with the three single or double alternating sequences. Returns None if the
+    extended partial series cannot be completed to a Gellermann series anymore.
+
+    To keep the number of states small, the number of reversals is clamped and the number of
+    matches is replaced by -1 as soon as the remaining elements cannot violate their constraints
+    anymore, such that partial series with the same completions share a state.
+    """
+    ones, run, reversals, single, double, double_shifted = state
+    half = n // 2
+    remaining = n - i - 1
+
+    ones += x
+    if ones > half or i + 1 - ones > half:
+        return None
+    if i + 1 <= half and (ones > half - n // 5 or i + 1 - ones > half - n // 5):
+        return None
+
+    if run != 0 and (run > 0) == x:
+        run += 1 if x else -1
+        if abs(run) > 3:
+            return None
+    else:
+        reversals += run != 0
+        run = 1 if x else -1
+    if reversals + -(-max(remaining - 3 + abs(run), 0) // 3) > half:
+        return None
+    reversals = max(reversals, half - remaining)
+
+    lowest, highest = alternation_range
+    ones_left = half - ones
+    matches = []
+    # Number of True elements in the remaining part of each alternating sequence
+    first, second, fourth = (n - 1) // 4 - i // 4, (n - 2) // 4 - (i - 1) // 4, (n - 4) // 4 - (i - 3) // 4
+    alternations = ((single, i % 2 == 0, (n - 1) // 2 - i // 2),
+                    (double, i % 4 < 2, first + second),
+                    (double_shifted, i % 4 in (0, 3), first + fourth))
+    for k, alternation, ones_positions in alternations:
+        if k < 0:
+            matches.append(k)
+            continue
+        k += alternation == x
+        # Placing a of the remaining True elements at the remaining True positions of the
+        # alternating sequence results in k + 2 * a + zeros_positions - ones_left matches.
+        zeros_positions = remaining - ones_positions
+        a_min, a_max = max(0, ones_left - zeros_positions), min(ones_left, ones_positions)
+        offset = k + zeros_positions - ones_left
+        a_low, a_high = max(a_min, -((offset - lowest) // 2)), min(a_max, (highest - offset) // 2)
+        if a_low > a_high:
+            return None
+        matches.append(-1 if (a_low, a_high) == (a_min, a_max) else k)
+
+    return (ones, run, reversals, *matches)
+
+
+def _gellermann_series_completions(counts: List[Dict[Tuple[int, ...], int]], n: int, alternation_range: Tuple[int, int], i: int,
+                                   state: Tuple[int, ...], x: bool) -> int:
+    """Count the completions of a partial boolean series of length i extended with element x."""
+    next_state = _gellermann_series_step(n, alternation_range, i, state, x)
+    if next_state is None:
+        return 0
+    return 1 if i + 1 == n else counts[i + 1].get(next_state, 0)
+
+
+@functools.lru_cache(maxsize=4)
+def _gellermann_series_counts(n: int, alternation_tolerance: float) -> Tuple[Tuple[int, int], List[Dict[Tuple[int, ...], int]]]:
+    """Count the completions to a Gellermann series of length n of all partial boolean series.
+
+    Returns the alternation range (the minimum and maximum allowed number of matches with the
+    alternating sequences), and for every length i < n, a dictionary mapping the state of a partial
+    series of length i (see `_gellermann_series_step`) to its number of completions, if nonzero.
+    Only the tables of the 4 most recently used n and alternation tolerances are cached.
+    """
+    assert n > 0 and n % 2 == 0
+    assert 0 <= alternation_tolerance <= 0.5
+
+    allowed_matches = [k for k in range(n + 1) if 0.5 - alternation_tolerance <= k / n <= 0.5 + alternation_tolerance]
+    alternation_range = (min(allowed_matches), max(allowed_matches))
+
+    counts: List[Dict[Tuple[int, ...], int]] = [{} for _ in range(n)]
+
+    def count_completions(i: int, state: Tuple[int, ...]) -> int:
+        if i == n:
+            return 1
+        count = counts[i].get(state)
+        if count is None:
+            next_states = (_gellermann_series_step(n, alternation_range, i, state, x) for x in (False, True))
+            count = sum(count_completions(i + 1, next_state) for next_state in next_states if next_state is not None)
+            counts[i][state] = count
+        return count
+
+    count_completions(0, (0, 0, 0, 0, 0, 0))
+    for level_counts in counts:
+        for state in [state for state, count in level_counts.items() if count == 0]:
+            del level_counts[state]
+
+    return alternation_range, counts
+
+
+def _check_rank_arguments(n: int, alternation_tolerance: float) -> None:
+    """Check the arguments of the rank and unrank functions."""
+    if n <= 0 or n % 2 != 0:
+        raise ValueError(f"Sequence length {n} is not positive and even.")
+    if not 0 <= alternation_tolerance <= 0.5:
+        raise ValueError(f"Alternation tolerance {alternation_tolerance} is not between 0 and 0.5.")
+
+
+def count_gellermann_series(n: int, alternation_tolerance: float = DEFAULT_ALTERNATION_TOLERANCE) -> int:
+    """Count the number of Gellermann series of length n.
+
+    This builds a table counting the completions of partial series, which is also used by
+    `rank_gellermann_series` and `unrank_gellermann_series`. The size of this table grows
+    polynomially in n: for n >= 40, building it takes seconds and hundreds of MB. The tables for
+    the 4 most recently used combinations of n and alternation tolerance are cached, so that
+    subsequent calls with the same arguments do not rebuild them.
+
+    Parameters
+    ----------
+    n
+        The length of the series.
+    alternation_tolerance
+        The tolerance around 50% chance level compared to single or double alternation, a value
+        between 0 and 0.5 (default: 0.1).
+
+    Returns
+    -------
+    int
+        The number of Gellermann series of length n, i.e., the number of series generated by
+        `generate_all_gellermann_series`.
+
+    Raises
+    ------
+    ValueError
+        If n is not positive and even, or if the alternation tolerance is not between 0 and 0.5.
+    """
+    _check_rank_arguments(n, alternation_tolerance)
+
+    _, counts = _gellermann_series_counts(n, alternation_tolerance)
+    return counts[0].get((0, 0, 0, 0, 0, 0), 0)
+
+
+def rank_gellermann_series(s: Sequence[Any], choices: Tuple[Any, Any] = ('A', 'B'),
+                           alternation_tolerance: float = DEFAULT_ALTERNATION_TOLERANCE) -> int:
+    """Get the index of a Gellermann series in the order of `generate_all_gellermann_series`.
+
+    Parameters
+    ----------
+    s
+        A Gellermann series of even length, containing only elements of choices.
+    choices
+        The two elements of the series, in lexicographic order (default: ('A', 'B')).
+    alternation_tolerance
+        The tolerance around 50% chance level compared to single or double alternation, a value
+        between 0 and 0.5 (default: 0.1).
+
+    Returns
+    -------
+    int
+        The index k such that `unrank_gellermann_series(k, len(s), ...)` returns s.
+
+    Raises
+    ------
+    ValueError
+        If the sequence length is not positive and even, if the sequence contains elements not in
+        choices, if the alternation tolerance is not between 0 and 0.5, or if the sequence is not a
+        Gellermann series.
+
+    Examples
+    --------
+    >>> rank_gellermann_series(['A', 'A', 'A', 'B', 'B', 'A', 'B', 'A', 'B', 'B'])
+    0
+    """
+    n = len(s)
+    _check_rank_arguments(n, alternation_tolerance)
+    if any(x not in choices for x in s):
+        raise ValueError(f"Sequence {s} contains elements not in {choices}.")
+
+    alternation_range, counts = _gellermann_series_counts(n, alternation_tolerance)
+    k = 0
+    state: Tuple[int, ...] = (0, 0, 0, 0, 0, 0)
+    for i, x in enumerate(s):
+        if x == choices[1]:
+            k += _gellermann_series_completions(counts, n, alternation_range, i, state, False)
+        if _gellermann_series_completions(counts, n, alternation_range, i, state, x == choices[1]) == 0:
+            raise ValueError(f"Sequence {s} is not a Gellermann series.")
+        next_state = _gellermann_series_step(n, alternation_range, i, state, x == choices[1])
+        assert next_state is not None
+        state = next_state
+
+    return k
+
+
+def unrank_gellermann_series(k: int, n: int, choices: Tuple[Any, Any] = ('A', 'B'),
+                             alternation_tolerance: float = DEFAULT_ALTERNATION_TOLERANCE) -> Sequence[Any]:
+    """Get the Gellermann series at index k in the order of `generate_all_gellermann_series`.
+
+    Together with `count_gellermann_series`, this allows sampling or splitting up the enumeration
+    of all Gellermann series without iterating over all preceding series.
+
+    Parameters
+    ----------
+    k
+        The index of the series, between 0 and `count_gellermann_series(n, ...)` (exclusive).
+    n
+        The length of the series.
+    choices
+        The two elements of the series, in lexicographic order (default: ('A', 'B')).
+    alternation_tolerance
+        The tolerance around 50% chance level compared to single or double alternation, a value
+        between 0 and 0.5 (default: 0.1).
+
+    Returns
+    -------
+    Sequence[Any]
+        The k-th Gellermann series of length n.
+
+    Raises
+    ------
+    ValueError
+        If n is not positive and even, if the alternation tolerance is not between 0 and 0.5, or if
+        k is not a valid index.
+    TypeError
+        If k is not an integer.
+
+    Examples
+    --------
+    >>> unrank_gellermann_series(0, 10)
+    ['A', 'A', 'A', 'B', 'B', 'A', 'B', 'A', 'B', 'B']
+    """
+    if isinstance(k, bool):
+        raise TypeError(f"Index {k} is not an integer.")
+    k = operator.index(k)
+    m = count_gellermann_series(n, alternation_tolerance=alternation_tolerance)
+    if not 0 <= k < m:
+        raise ValueError(f"Index {k} is not between 0 and {m} (exclusive).")
+
+    alternation_range, counts = _gellermann_series_counts(n, alternation_tolerance)
+    s = []
+    state: Tuple[int, ...] = (0, 0, 0, 0, 0, 0)
+    for i in range(n):
+        count_false = _gellermann_series_completions(counts, n, alternation_range, i, state, False)
+        x = k >= count_false
+        if x:
+            k -= count_false
+        next_state = _gellermann_series_step(n, alternation_range, i, state, x)
+        assert next_state is not None
+        state = next_state
+        s.append(choices[int(x)])
+
+    return s
+
+
 def _series_to_wide_format_df(series_list: List[Sequence[Any]]) -> pd.DataFrame:
     """Convert a list of series to a wide format DataFrame."""
     series_dicts = [{'series_i': i, **{f'element_{j}': x for j, x in enumerate(s)}} for i, s in enumerate(series_list)]
@@ -247,7 +680,8 @@ def generate_gellermann_series_table(n: int, m: int, long_format: bool = False,
     long_format
         If True, the DataFrame is in long format (default: False).
     kwargs
-        Additional keyword arguments passed to `generate_gellermann_series`.
+        Additional keyword arguments passed to `generate_gellermann_series` (except for output,
+        block_size, and out).
 
     Returns
     -------
@@ -257,7 +691,7 @@ def generate_gellermann_series_table(n: int, m: int, long_format: bool = False,
     assert n % 2 == 0
     assert m > 0
 
-    generated_series = list(generate_gellermann_series(n, m, **kwargs))
+    generated_series = list(generate_gellermann_series(n, m, output='list', **kwargs))
     if long_format:
         return _series_to_long_format_df(generated_series)
     else:
@@ -61,10 +61,78 @@ def test_generate_gellermann_series_max_iterations():
     assert len(series) == 0
 
 
+@pytest.mark.parametrize('block_size', [None, 1, 3, 20])
+@pytest.mark.parametrize('n', [10, 20, 40])
+def test_generate_gellermann_series_array(n, block_size):
+    blocks = list(pygellermann.generate_gellermann_series(n, 20, output='array', block_size=block_size))
+    assert all(b.dtype == np.bool_ and b.ndim == 2 and b.shape[1] == n for b in blocks)
+    assert all(len(b) == (block_size or 20) for b in blocks[:-1])
+    all_series = np.concatenate(blocks)
+    assert len(all_series) == 20
+    assert all(pygellermann.is_gellermann_series(s) for s in all_series)
+
+
+def test_generate_gellermann_series_array_rng():
+    series = np.concatenate(list(pygellermann.generate_gellermann_series(10, 5, rng=np.random.default_rng(42), output='array')))
+    blocks = list(pygellermann.generate_gellermann_series(10, 5, rng=np.random.default_rng(42), output='array', block_size=2))
+    assert [len(b) for b in blocks] == [2, 2, 1]
+    assert np.array_equal(np.concatenate(blocks), series)
+
+    blocks = list(pygellermann.generate_gellermann_series(10, 5, choices=('A', 'B'), rng=np.random.default_rng(42), output='array'))
+    assert blocks[0].tolist() == [['B' if x else 'A' for x in s] for s in series]
+
+
+def test_generate_gellermann_series_array_max_iterations():
+    blocks = list(pygellermann.generate_gellermann_series(8, 5, output='array', max_iterations=1000))
+    assert len(blocks) == 0
+
+
+@pytest.mark.parametrize('tolerance', [0.0, 0.1, 0.3, 0.5])
+@pytest.mark.parametrize('n', [10, 20])
+def test_is_boolean_gellermann_series_batch(n, tolerance):
+    rng = np.random.default_rng(42)
+    s = np.concatenate([rng.permuted(np.tile(np.repeat([True, False], n // 2), (1000, 1)), axis=1), rng.random((100, n)) < 0.5])
+    valid = pygellermann.gellermann.is_boolean_gellermann_series_batch(s, alternation_tolerance=tolerance)
+    assert valid.tolist() == [pygellermann.gellermann.is_boolean_gellermann_series(r, alternation_tolerance=tolerance) for r in s]
+
+
+@pytest.mark.parametrize('choices', [None, (0, 1), ('L', 'R')])
+def test_generate_gellermann_series_array_out(choices):
+    out = np.empty((4, 10), dtype=np.uint8 if choices == (0, 1) else object if choices else bool)
+    for block in pygellermann.generate_gellermann_series(10, 10, choices=choices, output='array', out=out):
+        assert np.shares_memory(block, out)
+        assert len(block) in (4, 2)
+        assert all(pygellermann.is_gellermann_series(s) for s in block)
+
+
+def test_generate_gellermann_series_array_errors():
+    with pytest.raises(ValueError):
+        next(pygellermann.generate_gellermann_series(10, 5, output='tuple'))
+    with pytest.raises(ValueError):
+        next(pygellermann.generate_gellermann_series(10, 5, block_size=2))
+    with pytest.raises(ValueError):
+        next(pygellermann.generate_gellermann_series(10, 5, output='array', block_size=0))
+    with pytest.raises(ValueError):
+        next(pygellermann.generate_gellermann_series(10, 5, output='array', out=np.empty((5, 8), dtype=bool)))
+    with pytest.raises(ValueError):
+        next(pygellermann.generate_gellermann_series(10, 5, choices=('L', 'R'), output='array', out=np.empty((5, 10), dtype=np.uint8)))
+    with pytest.raises(ValueError):
+        next(pygellermann.generate_gellermann_series(10, 0, output='array'))
+    with pytest.raises(ValueError):
+        next(pygellermann.generate_gellermann_series(10, 0))
+
+
+def test_generate_gellermann_series_array_default_block_size(monkeypatch):
+    monkeypatch.setattr(pygellermann.gellermann, 'DEFAULT_BLOCK_SIZE', 4)
+    blocks = list(pygellermann.generate_gellermann_series(10, 10, output='array'))
+    assert [len(b) for b in blocks] == [4, 4, 2]
+
+
 @pytest.mark.parametrize('n, m_expected', [(10, 8), (16, 80), (20, 4726)])
 def test_generate_all_gellermann_series(n, m_expected):
     all_series = list(pygellermann.generate_all_gellermann_series(n))
     assert len(all_series) == m_expected
+    assert pygellermann.count_gellermann_series(n) == m_expected
     assert all(len(s) == n for s in all_series)
     assert set.union(*map(set, all_series)) == {'A', 'B'}
 
@@ -80,13 +148,70 @@ def test_generate_all_gellermann_series_tolerance(tolerance, m_expected):
     assert set.union(*map(set, all_series)) == {'A', 'B'}
 
 
-@pytest.mark.parametrize('choices', [('L', 'R'), ('R', 'L'), (1, 2), ('ABC', (42,))])
+@pytest.mark.parametrize('n, tolerance', [(10, 0.0), (10, 0.1), (10, 0.3), (10, 0.5), (16, 0.1), (16, 0.5)])
+def test_rank_unrank_gellermann_series(n, tolerance):
+    all_series = list(pygellermann.generate_all_gellermann_series(n, alternation_tolerance=tolerance))
+    assert pygellermann.count_gellermann_series(n, alternation_tolerance=tolerance) == len(all_series)
+
+    for k, s in enumerate(all_series):
+        assert pygellermann.rank_gellermann_series(s, alternation_tolerance=tolerance) == k
+        assert pygellermann.unrank_gellermann_series(k, n, alternation_tolerance=tolerance) == s
+
+
+@pytest.mark.parametrize('choices', [('L', 'R'), (1, 2)])
+def test_rank_unrank_gellermann_series_large(choices):
+    assert pygellermann.count_gellermann_series(30) == 937902
+
+    for s in pygellermann.generate_gellermann_series(30, 20, choices=choices):
+        k = pygellermann.rank_gellermann_series(s, choices=choices)
+        assert 0 <= k < 937902
+        assert pygellermann.unrank_gellermann_series(k, 30, choices=choices) == s
+
+
+@pytest.mark.parametrize('n', [20, 22])
+def test_unrank_gellermann_series_first_last(n):
+    m = pygellermann.count_gellermann_series(n)
+    all_series = pygellermann.generate_all_gellermann_series(n)
+    assert pygellermann.unrank_gellermann_series(0, n) == next(all_series)
+    assert pygellermann.unrank_gellermann_series(1, n) == next(all_series)
+
+    # Swapping the elements of a Gellermann series gives a Gellermann series, and reverses the order
+    complemented_series = pygellermann.generate_all_gellermann_series(n, choices=('B', 'A'))
+    assert pygellermann.unrank_gellermann_series(m - 1, n) == next(complemented_series)
+    assert pygellermann.unrank_gellermann_series(m - 2, n) == next(complemented_series)
+
+
+def test_rank_unrank_gellermann_series_errors():
+    with pytest.raises(ValueError):
+        pygellermann.rank_gellermann_series("AAAAABBBBB")
+    with pytest.raises(ValueError):
+        pygellermann.rank_gellermann_series("AAABBABABBB")
+    with pytest.raises(ValueError):
+        pygellermann.rank_gellermann_series("LLRRLRLLRR")
+    with pytest.raises(ValueError):
+        pygellermann.unrank_gellermann_series(8, 10)
+    with pytest.raises(ValueError):
+        pygellermann.unrank_gellermann_series(-1, 10)
+    with pytest.raises(TypeError):
+        pygellermann.unrank_gellermann_series(0.5, 10)
+    with pytest.raises(TypeError):
+        pygellermann.unrank_gellermann_series(True, 10)
+    with pytest.raises(ValueError):
+        pygellermann.count_gellermann_series(0)
+
+
+@pytest.mark.parametrize('output', ['list', 'array'])
+@pytest.mark.parametrize('choices', [('L', 'R'), ('R', 'L'), (1, 2), ('ABC', (42,)), (1, 'A'), ((1, 2), (3, 4))])
 @pytest.mark.parametrize('n', [10, 20, 40])
-def test_generate_gellermann_series_choices(n, choices):
-    series = next(pygellermann.generate_gellermann_series(n, 1, choices=choices))
+def test_generate_gellermann_series_choices(n, choices, output):
+    series = next(pygellermann.generate_gellermann_series(n, 1, choices=choices, output=output))
+    if output == 'array':
+        assert series.shape == (1, n)
+        series = series[0].tolist()
     assert pygellermann.is_gellermann_series(series)
     assert len(series) == n
     assert set(series) == set(choices)
+    assert all(type(x) is type(c) for x in series for c in choices if x == c)
 
 
 @pytest.mark.parametrize('m', [1, 5, 20])